@@ -0,0 +1,81 @@
+"""
+Offline compression of the orchestration SYSTEM_PROMPT with LLMLingua-2.
+
+`task/prompts.py` stays the source of truth, this script produces `task/prompts_compressed.py` with
+`SYSTEM_PROMPT_COMPRESSED` that is sent to the model on every turn when `USE_COMPRESSED_PROMPT=true`. The generated
+file stores hash of the source prompt, app refuses to start with it once SYSTEM_PROMPT is changed, so re-run:
+
+    pip install llmlingua
+    python -m scripts.compress_prompts
+"""
+import hashlib
+import re
+from pathlib import Path
+
+from llmlingua import PromptCompressor
+
+from task.prompts import SYSTEM_PROMPT
+
+_MODEL_NAME = "microsoft/llmlingua-2-xlm-roberta-large-meetingbank"
+_RATE = 0.5
+# Keep markdown structure of the prompt untouched
+_FORCE_TOKENS = ['\n', '##', '**', '-', ':']
+
+# Zones that must survive compression verbatim: code fences, bold rule bullets (with their indented continuation
+# lines) and quoted trigger words (e.g. "yes"/"confirm" in the deletion confirmation flow)
+_PROTECTED_ZONE_PATTERN = re.compile(
+    r"(?s:```.*?```)"
+    r"|^[ \t]*- \*\*.*(?:\n[ \t]+\S.*)*"
+    r"|^.*[\"'`](?:yes|confirm)[\"'`].*$",
+    flags=re.MULTILINE | re.IGNORECASE,
+)
+
+_OUTPUT_PATH = Path(__file__).resolve().parent.parent / "task" / "prompts_compressed.py"
+
+
+def _split_zones(prompt: str) -> list[tuple[str, bool]]:
+    """Split prompt into (text, is_protected) segments preserving the original order."""
+    segments: list[tuple[str, bool]] = []
+    position = 0
+    for match in _PROTECTED_ZONE_PATTERN.finditer(prompt):
+        if match.start() > position:
+            segments.append((prompt[position:match.start()], False))
+        segments.append((match.group(0), True))
+        position = match.end()
+    if position < len(prompt):
+        segments.append((prompt[position:], False))
+    return segments
+
+
+def compress(prompt: str) -> str:
+    compressor = PromptCompressor(model_name=_MODEL_NAME, use_llmlingua2=True, device_map="cpu")
+
+    parts: list[str] = []
+    for text, is_protected in _split_zones(prompt):
+        if is_protected or not text.strip():
+            parts.append(text)
+            continue
+        result = compressor.compress_prompt(text, rate=_RATE, force_tokens=_FORCE_TOKENS)
+        # LLMLingua drops surrounding whitespace, restore it to keep protected zones on their own lines
+        leading = text[:len(text) - len(text.lstrip())]
+        trailing = text[len(text.rstrip()):]
+        parts.append(f"{leading}{result['compressed_prompt']}{trailing}")
+
+    compressed = "".join(parts)
+    print(f"Compressed {len(prompt)} -> {len(compressed)} chars")
+    return compressed
+
+
+def main():
+    compressed = compress(SYSTEM_PROMPT)
+    _OUTPUT_PATH.write_text(
+        "# Generated by scripts/compress_prompts.py from task/prompts.py, don't edit manually\n"
+        f"SOURCE_PROMPT_SHA256 = {hashlib.sha256(SYSTEM_PROMPT.encode('utf-8')).hexdigest()!r}\n"
+        f"SYSTEM_PROMPT_COMPRESSED = {compressed!r}\n",
+        encoding="utf-8",
+    )
+    print(f"Saved to {_OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
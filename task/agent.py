@@ -81,7 +81,8 @@ class GeneralPurposeAgent:
                     tool_call=tool_call,
                     choice=choice,
                     api_key=api_key,
-                    conversation_id=request.headers['x-conversation-id']
+                    conversation_id=request.headers['x-conversation-id'],
+                    messages_count=len(request.messages),
                 )
                 for tool_call in assistant_message.tool_calls
             ]
@@ -119,8 +120,9 @@ class GeneralPurposeAgent:
 
         return unpacked_messages
 
-    async def _process_tool_call(self, tool_call: ToolCall, choice: Choice, api_key: str, conversation_id: str) -> dict[
-        str, Any]:
+    async def _process_tool_call(
+            self, tool_call: ToolCall, choice: Choice, api_key: str, conversation_id: str, messages_count: int
+    ) -> dict[str, Any]:
         tool_name = tool_call.function.name
         stage = StageProcessor.open_stage(
             choice,
@@ -130,10 +132,11 @@ class GeneralPurposeAgent:
         tool = self._tools_dict[tool_name]
 
         if tool.show_in_stage:
-            stage.append_content("## Request arguments: \n")
             stage.append_content(
-                f"```json\n\r{json.dumps(json.loads(tool_call.function.arguments), indent=2)}\n\r```\n\r")
-            stage.append_content("## Response: \n")
+                "## Request arguments: \n"
+                f"```json\n\r{json.dumps(json.loads(tool_call.function.arguments), indent=2)}\n\r```\n\r"
+                "## Response: \n"
+            )
 
         tool_message = await tool.execute(
             ToolCallParams(
@@ -141,7 +144,8 @@ class GeneralPurposeAgent:
                 stage=stage,
                 choice=choice,
                 api_key=api_key,
-                conversation_id=conversation_id
+                conversation_id=conversation_id,
+                messages_count=messages_count,
             )
         )
 
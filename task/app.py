@@ -1,4 +1,6 @@
+import hashlib
 import os
+from contextlib import asynccontextmanager
 
 from aidial_sdk import DIALApp
 from aidial_sdk.chat_completion import ChatCompletion, Request, Response
@@ -21,12 +23,30 @@ from task.tools.rag.rag_tool import RagTool
 DIAL_ENDPOINT = os.getenv('DIAL_ENDPOINT', "http://localhost:8080")
 DEPLOYMENT_NAME = os.getenv('DEPLOYMENT_NAME', 'gpt-4o')
 # DEPLOYMENT_NAME = os.getenv('DEPLOYMENT_NAME', 'claude-sonnet-3-7')
+USE_COMPRESSED_PROMPT = os.getenv('USE_COMPRESSED_PROMPT', 'false').lower() == 'true'
+
+
+def _get_system_prompt() -> str:
+    """Verbose `task/prompts.py` prompt or, if enabled, its LLMLingua-2 compressed version."""
+    if not USE_COMPRESSED_PROMPT:
+        return SYSTEM_PROMPT
+
+    # Generated by `scripts/compress_prompts.py`, missing or stale file fails the startup instead of silently
+    # sending an outdated prompt
+    from task.prompts_compressed import SOURCE_PROMPT_SHA256, SYSTEM_PROMPT_COMPRESSED
+    if SOURCE_PROMPT_SHA256 != hashlib.sha256(SYSTEM_PROMPT.encode('utf-8')).hexdigest():
+        raise RuntimeError(
+            "task/prompts_compressed.py is compressed from outdated SYSTEM_PROMPT, "
+            "re-run `python -m scripts.compress_prompts`"
+        )
+    return SYSTEM_PROMPT_COMPRESSED
 
 
 class GeneralPurposeAgentApplication(ChatCompletion):
 
     def __init__(self):
         self.tools: list[BaseTool] = []
+        self.system_prompt = _get_system_prompt()
         self.memory_store = LongTermMemoryStore(endpoint=DIAL_ENDPOINT)
 
     async def _get_mcp_tools(self, url: str) -> list[BaseTool]:
@@ -76,7 +96,7 @@ class GeneralPurposeAgentApplication(ChatCompletion):
         with response.create_single_choice() as choice:
             await GeneralPurposeAgent(
                 endpoint=DIAL_ENDPOINT,
-                system_prompt=SYSTEM_PROMPT,
+                system_prompt=self.system_prompt,
                 tools=self.tools
             ).handle_request(
                 choice=choice,
@@ -86,7 +106,14 @@ class GeneralPurposeAgentApplication(ChatCompletion):
             )
 
 
-app: DIALApp = DIALApp()
+@asynccontextmanager
+async def lifespan(_: DIALApp):
+    yield
+    # Memories stored right before shutdown are still being uploaded
+    await agent_app.memory_store.flush()
+
+
+app: DIALApp = DIALApp(lifespan=lifespan)
 agent_app = GeneralPurposeAgentApplication()
 app.add_chat_completion(deployment_name="general-purpose-agent", impl=agent_app)
 
@@ -1,10 +1,26 @@
+import asyncio
+import base64
 from datetime import datetime, UTC
-from pydantic import BaseModel, Field
+from typing import Any
 
+import faiss
+import numpy as np
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
-class MemoryData(BaseModel):
-    """Core memory data without embedding."""
-    id: int
+
+def encode_embedding(embedding: np.ndarray) -> str:
+    """Encode embedding as base64 float16 bytes, 2x smaller than float32 and ~8x smaller than JSON floats."""
+    return base64.b64encode(embedding.astype(np.float16).tobytes()).decode("ascii")
+
+
+def decode_embeddings(embeddings_b64: list[str]) -> np.ndarray:
+    """Decode base64 float16 embeddings into float32 matrix (FAISS works with float32 only)."""
+    raw = b"".join(base64.b64decode(embedding_b64) for embedding_b64 in embeddings_b64)
+    return np.frombuffer(raw, dtype=np.float16).reshape(len(embeddings_b64), -1).astype(np.float32)
+
+
+class NewMemory(BaseModel):
+    """Memory to store, storage assigns its id."""
     content: str = Field(min_length=1, description="Memory content")
     importance: float = Field(
         default=0.5,
@@ -16,10 +32,28 @@ class MemoryData(BaseModel):
     topics: list[str] = Field(default_factory=list, description="Related topics")
 
 
+class MemoryData(NewMemory):
+    """Core memory data without embedding."""
+    id: int
+
+
 class Memory(BaseModel):
-    """Memory entry with embedding."""
+    """Memory entry. Embeddings are stored in `.npy` sidecar files, row i belongs to memories[i]."""
     data: MemoryData
-    embedding: list[float] = Field(description="Vector embedding")
+    embedding_b64: str | None = Field(
+        default=None,
+        exclude=True,
+        description="Legacy inline embedding (base64 encoded float16 bytes), only read to migrate old files"
+    )
+
+    @model_validator(mode="before")
+    @classmethod
+    def _migrate_float_embedding(cls, values: Any) -> Any:
+        """Memories saved before float16 storage have `embedding` as list of floats."""
+        if isinstance(values, dict) and "embedding" in values and "embedding_b64" not in values:
+            values = {**values}
+            values["embedding_b64"] = encode_embedding(np.asarray(values.pop("embedding"), dtype=np.float32))
+        return values
 
 
 class MemoryCollection(BaseModel):
@@ -27,6 +61,25 @@ class MemoryCollection(BaseModel):
     memories: list[Memory] = Field(default_factory=list)
     updated_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
     last_deduplicated_at: datetime | None = None
+    faiss_index_id: str | None = Field(default=None, description="Id of the persisted FAISS index sidecar")
+    embeddings_id: str | None = Field(
+        default=None,
+        description="Id of the persisted embeddings sidecars, changes when all of them are rewritten"
+    )
+
+    # Search state, not serialized: L2-normalized embeddings matrix and FAISS index over it (row i == memories[i])
+    _normalized: np.ndarray | None = PrivateAttr(default=None)
+    _faiss_index: faiss.Index | None = PrivateAttr(default=None)
+    # Number of leading embedding rows already persisted in sidecar files
+    _embeddings_saved_rows: int = PrivateAttr(default=0)
+    # Bumped when rows are shifted (deduplication), rows uploaded with an older layout don't count as persisted
+    _layout_version: int = PrivateAttr(default=0)
+    # Whether `_faiss_index` (possibly without the latest rows) is persisted in the index sidecar
+    _faiss_index_saved: bool = PrivateAttr(default=False)
+    # Held while the index is modified or searched off the event loop (adds, deduplication)
+    _index_lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
+    # Deletion generation of the user files the collection was loaded from, see `LongTermMemoryStore`
+    _generation: int = PrivateAttr(default=0)
 
     class Config:
         json_encoders = {
@@ -0,0 +1,71 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from task.tools.memory.micro_batcher import MicroBatcher
+
+
+class EmbeddingBatcher(MicroBatcher[str, np.ndarray]):
+    """
+    Micro-batching wrapper around embedding model.
+
+    Texts requested concurrently are encoded with a single model call, see `MicroBatcher`.
+    Embeddings of recently seen texts (tool call retries, repeated queries) are served from LRU cache.
+    """
+
+    def __init__(
+            self,
+            model: SentenceTransformer,
+            batch_size: int = 32,
+            max_wait_seconds: float = 0.005,
+            cache_max_size: int = 1024,
+    ):
+        super().__init__(self._encode, max_wait_seconds)
+        self.model = model
+        self.batch_size = batch_size
+        self.cache_max_size = cache_max_size
+        self._cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+
+    async def embed(self, text: str) -> np.ndarray:
+        """L2-normalized float32 embedding of the text."""
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: list[str]) -> np.ndarray:
+        """L2-normalized float32 embeddings matrix, row i belongs to texts[i]."""
+        keys = [hashlib.blake2s(text.encode(), digest_size=16).digest() for text in texts]
+        vectors: list[np.ndarray | None] = [self._get_cached(key) for key in keys]
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = await self.submit_many([texts[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                # Copy detaches the row from its batch matrix, so cache doesn't pin whole batches
+                vector = vector.copy()
+                vector.flags.writeable = False
+                vectors[i] = vector
+                self._put_cached(keys[i], vector)
+
+        # np.stack copies, so callers never mutate cached vectors
+        return np.stack(vectors)
+
+    def _get_cached(self, key: bytes) -> np.ndarray | None:
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+        return vector
+
+    def _put_cached(self, key: bytes, vector: np.ndarray):
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_max_size:
+            self._cache.popitem(last=False)
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        ).astype(np.float32, copy=False)
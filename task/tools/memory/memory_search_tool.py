@@ -6,6 +6,42 @@ from task.tools.memory._models import MemoryData
 from task.tools.memory.memory_store import LongTermMemoryStore
 from task.tools.models import ToolCallParams
 
+_NAME = "search_long_term_memory"
+
+# In long conversations relevant memories are mostly already in the history, extra search results are mostly false
+# positives, so only the best match is returned
+_LONG_CONVERSATION_THRESHOLD = 20
+_LONG_CONVERSATION_TOP_K = 1
+
+_DESCRIPTION = ("Searches long-term memories about the user (facts stored in previous conversations: personal info, "
+               "preferences, goals, plans, context) using semantic similarity. "
+               "Use it at the start of a conversation and whenever the answer may depend on who the user is, where "
+               "they live or work, what they like or plan, even if the user doesn't mention memories explicitly "
+               "(e.g. 'What should I wear today?' needs the user's location). "
+               "Query with keywords or a question describing the needed information, not with the user's full message. "
+               "Returns up to `top_k` memories with content, category and topics, or 'No memories found.'. "
+               f"In conversations longer than {_LONG_CONVERSATION_THRESHOLD} messages only the best matching memory "
+               "is returned, search there only for new personal topics.")
+
+_PARAMETERS: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "query": {
+            "type": "string",
+            "description": "The search query. Can be a question or keywords to find relevant memories"
+        },
+        "top_k": {
+            "type": "integer",
+            "description": "Number of most relevant memories to return.",
+            "minimum": 1,
+            "maximum": 20,
+            "default": 3
+        }
+    },
+    "required": ["query"],
+    "additionalProperties": False
+}
+
 
 class SearchMemoryTool(BaseTool):
     """
@@ -20,31 +56,40 @@ class SearchMemoryTool(BaseTool):
 
     @property
     def name(self) -> str:
-        # TODO: provide self-descriptive name
-        raise NotImplementedError()
+        return _NAME
 
     @property
     def description(self) -> str:
-        # TODO: provide tool description that will help LLM to understand when to use this tools and cover 'tricky'
-        #  moments (not more 1024 chars)
-        raise NotImplementedError()
+        return _DESCRIPTION
 
     @property
     def parameters(self) -> dict[str, Any]:
-        # TODO: provide tool parameters JSON Schema:
-        #  - query is string, description: "The search query. Can be a question or keywords to find relevant memories", required
-        #  - top_k is integer, description: "Number of most relevant memories to return.", minimum is 1, maximum is 20, default is 5
-        raise NotImplementedError()
-
+        return _PARAMETERS
 
     async def _execute(self, tool_call_params: ToolCallParams) -> str:
-        #TODO:
-        # 1. Load arguments with `json`
-        # 2. Get `query` from arguments
-        # 3. Get `top_k` from arguments, default is 5
-        # 4. Call `memory_store` `search_memories` (we will implement logic in `memory_store` later)
-        # 5. If results are empty then set `final_result` as "No memories found.",
-        #    otherwise iterate through results and collect content, category and topics (if preset) in markdown format
-        # 6. Add result to stage as markdown text
-        # 7. Return result
-        raise NotImplementedError()
+        arguments = json.loads(tool_call_params.tool_call.function.arguments)
+        query = arguments["query"]
+        top_k = arguments.get("top_k", 3)
+        if tool_call_params.messages_count > _LONG_CONVERSATION_THRESHOLD:
+            top_k = min(top_k, _LONG_CONVERSATION_TOP_K)
+
+        results: list[MemoryData] = await self.memory_store.search_memories(
+            api_key=tool_call_params.api_key,
+            query=query,
+            top_k=top_k,
+        )
+
+        if not results:
+            final_result = "No memories found."
+        else:
+            parts = [f"Found {len(results)} relevant memories:\n"]
+            for i, memory in enumerate(results, 1):
+                parts.append(f"\n**{i}. {memory.content}**\n- Category: {memory.category}\n")
+                if memory.topics:
+                    parts.append(f"- Topics: {', '.join(memory.topics)}\n")
+            final_result = "".join(parts)
+
+        # Single stage write, every `append_content` is a separate chunk streamed to the client
+        tool_call_params.stage.append_content(f"{final_result}\n\r")
+
+        return final_result
@@ -1,131 +1,622 @@
 import os
 os.environ['OMP_NUM_THREADS'] = '1'
 
-import json
+import asyncio
+import io
+import math
+import platform
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, UTC, timedelta
+from typing import Coroutine
+
 import numpy as np
 import faiss
-from aidial_client import AsyncDial
-from sentence_transformers import SentenceTransformer
+import orjson
+import torch
+from aidial_client import AsyncDial, DialException, ResourceNotFoundError
+from sentence_transformers import SentenceTransformer, CrossEncoder
+
+from task.tools.memory._models import Memory, MemoryData, MemoryCollection, NewMemory, decode_embeddings
+from task.tools.memory.embedding_batcher import EmbeddingBatcher
+from task.tools.memory.micro_batcher import MicroBatcher
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+
+def _get_default_onnx_file() -> str:
+    """
+    Dynamically int8-quantized ONNX export shipped in the model repo for the host CPU, runs ~3-4x faster than PyTorch
+    fp32 on CPU. Each variant is quantized for its instruction set, on other CPUs it is slower or loses accuracy
+    (u8s8 saturation without VNNI), so unknown CPUs get unquantized export.
+    """
+    if platform.machine().lower() in ('arm64', 'aarch64'):
+        return 'onnx/model_qint8_arm64.onnx'
 
-from task.tools.memory._models import Memory, MemoryData, MemoryCollection
+    try:
+        with open('/proc/cpuinfo') as cpuinfo:
+            flags = next((line.split(':', 1)[1].split() for line in cpuinfo if line.startswith('flags')), [])
+    except OSError:
+        flags = []
+    if 'avx512_vnni' in flags:
+        return 'onnx/model_qint8_avx512_vnni.onnx'
+    if 'avx512f' in flags:
+        return 'onnx/model_qint8_avx512.onnx'
+    if 'avx2' in flags:
+        return 'onnx/model_quint8_avx2.onnx'
+    return 'onnx/model.onnx'
+
+
+EMBEDDING_MODEL_ONNX_FILE = os.getenv('EMBEDDING_MODEL_ONNX_FILE') or _get_default_onnx_file()
+RERANKER_MODEL_NAME = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
 
 
 class LongTermMemoryStore:
     """
     Manages long-term memory storage for users.
 
-    Storage format: Single JSON file per user in DIAL bucket
-    - File: {user_id}/long-memories.json
-    - Caching: In-memory cache with conversation_id as key
+    Storage format: JSON metadata file + `.npy` embeddings sidecars per user in DIAL bucket
+    - File: {appdata}/__long-memories/data.json (memories without embeddings, small, rewritten on every change)
+    - Embeddings: {appdata}/__long-memories/embeddings_{chunk}.npy (`embeddings_id` + float16 matrix of
+      EMBEDDINGS_CHUNK_SIZE rows, only chunks with new rows are uploaded)
+    - Index: {appdata}/__long-memories/index.faiss (serialized HNSW index, saved only when it is rebuilt, newer rows
+      are added to it on load)
+    - Caching: In-memory LRU cache (collection + its FAISS index) with memory file path as key
     - Deduplication: O(n log n) using FAISS batch search
     """
 
     DEDUP_INTERVAL_HOURS = 24
+    DEDUP_SIMILARITY_THRESHOLD = 0.75
+    DEDUP_NEIGHBORS = 10
+    ENCODE_BATCH_SIZE = 32
+    CACHE_MAX_SIZE = 128
+    EMBEDDING_CACHE_MAX_SIZE = 1024
+    # Saves requested within this window (e.g. parallel store tool calls of one turn) are coalesced into one upload,
+    # store tool call waits for it
+    SAVE_DELAY_SECONDS = 0.1
+    # Transient upload failures are retried with linearly growing delay, client errors (4xx) are not retried
+    SAVE_MAX_ATTEMPTS = 3
+    SAVE_RETRY_DELAY_SECONDS = 0.5
+    # Vector search retrieves top_k * RERANK_CANDIDATES_FACTOR candidates, cross-encoder picks the best top_k of them
+    RERANK_CANDIDATES_FACTOR = 4
+    EMBEDDINGS_CHUNK_SIZE = 1000
+    # Exact search is cheap for small collections, above this size switch to approximate HNSW graph search.
+    # Graph is built rarely (persisted in index sidecar), so construction favours recall over build time
+    HNSW_THRESHOLD = 500
+    HNSW_M = 32
+    HNSW_EF_CONSTRUCTION = 80
+    HNSW_EF_SEARCH = 64
+    # HNSW stores vectors as int8 (4x less memory and sidecar bytes, <1% recall loss on normalized embeddings)
+    HNSW_QUANTIZER = faiss.ScalarQuantizer.QT_8bit
 
     def __init__(self, endpoint: str):
-        #TODO:
-        # 1. Set endpoint
-        # 2. Create SentenceTransformer as model, model name is `all-MiniLM-L6-v2`
-        # 3. Create cache, doct of str and MemoryCollection (it is imitation of cache, normally such cache should be set aside)
-        # 4. Make `faiss.omp_set_num_threads(1)` (without this set up you won't be able to work in debug mode in `_deduplicate_fast` method
-        raise NotImplementedError()
+        self.endpoint = endpoint
+        self.model = self._create_embedding_model()
+        self.embedder = EmbeddingBatcher(
+            self.model, batch_size=self.ENCODE_BATCH_SIZE, cache_max_size=self.EMBEDDING_CACHE_MAX_SIZE
+        )
+        self.reranker = CrossEncoder(RERANKER_MODEL_NAME)
+        # Candidates of concurrent searches are scored with one cross-encoder call
+        self.reranker_batcher: MicroBatcher[tuple[str, str], float] = MicroBatcher(
+            lambda pairs: self.reranker.predict(pairs, batch_size=self.ENCODE_BATCH_SIZE)
+        )
+        self.cache: OrderedDict[str, MemoryCollection] = OrderedDict()
+        # Background work, keyed by collection id: running deduplications and delayed saves
+        self._deduplicating: dict[int, asyncio.Task] = {}
+        self._pending_saves: dict[int, asyncio.Task] = {}
+        # In-flight downloads by memory file path, concurrent loads of the same user share one collection
+        self._loading: dict[str, asyncio.Task] = {}
+        # By memory file path: uploads and deletion of user files are serialized, deletion bumps the generation so
+        # collections loaded before it are never uploaded again
+        self._save_locks: dict[str, asyncio.Lock] = {}
+        self._generations: dict[str, int] = {}
+        self._background_tasks: set[asyncio.Task] = set()
+        # Set on shutdown, pending saves are uploaded without waiting for SAVE_DELAY_SECONDS
+        self._flush_requested = asyncio.Event()
+        faiss.omp_set_num_threads(1)
+
+    @staticmethod
+    def _create_embedding_model() -> SentenceTransformer:
+        if torch.cuda.is_available():
+            # fp16 halves memory traffic of the matmul-bound encoder on GPU
+            return SentenceTransformer(EMBEDDING_MODEL_NAME, device='cuda', model_kwargs={'torch_dtype': torch.float16})
+
+        try:
+            return SentenceTransformer(
+                EMBEDDING_MODEL_NAME,
+                backend='onnx',
+                model_kwargs={'file_name': EMBEDDING_MODEL_ONNX_FILE},
+            )
+        except Exception as e:
+            print(f"ONNX embedding model is not available, falling back to PyTorch: {e}")
+            return SentenceTransformer(EMBEDDING_MODEL_NAME)
 
     async def _get_memory_file_path(self, dial_client: AsyncDial) -> str:
         """Get the path to the memory file in DIAL bucket."""
-        #TODO:
-        # 1. Get DIAL app home path
-        # 2. Return string with path in such format: `files/{bucket_with_app_home}/__long-memories/data.json`
-        #    The memories will persist in appdata for this agent in `__long-memories` folder and `data.json` file
-        #    (You will be able to check it also in Chat UI in attachments)
-        raise NotImplementedError()
+        bucket_with_app_home = await dial_client.my_appdata_home()
+        return f"files/{(bucket_with_app_home / '__long-memories' / 'data.json').as_posix()}"
+
+    @staticmethod
+    def _get_embeddings_file_path(memory_file_path: str, chunk: int) -> str:
+        """Get the path to the embeddings sidecar chunk next to the memory file."""
+        return f"{memory_file_path.rsplit('/', 1)[0]}/embeddings_{chunk}.npy"
+
+    @staticmethod
+    def _get_index_file_path(memory_file_path: str) -> str:
+        """Get the path to the FAISS index sidecar next to the memory file."""
+        return f"{memory_file_path.rsplit('/', 1)[0]}/index.faiss"
 
     async def _load_memories(self, api_key: str) -> MemoryCollection:
-        #TODO:
-        # 1. Create AsyncDial client
-        # 2. Get memory file path
-        # 3. Check cache: cache is dict of str and MemoryCollection, for the key we will use `memory file path` to make
-        #    it simple. Such key will be unique for user and will allow to access memories across different
-        #    conversations and only user can access them. In case if cache is present return its MemoryCollection.
-        # ---
-        # Below is logic when cache is not present:
-        # 4. Open try-except block:
-        #   - in try:
-        #       - download file content
-        #       - in response get content and decode it with 'utf-8'
-        #       - load content with `json`
-        #       - create MemoryCollection (it is pydentic model, use `model_validate` method)
-        #   - in except:
-        #       - create MemoryCollection (it will have empty memories, set up time for updated_at, more detailed take
-        #         a look at MemoryCollection pydentic model and it Fields)
-        # 5. Return created MemoryCollection
-        raise NotImplementedError()
+        dial_client = AsyncDial(base_url=self.endpoint, api_key=api_key)
+        memory_file_path = await self._get_memory_file_path(dial_client)
+
+        if memory_file_path in self.cache:
+            self.cache.move_to_end(memory_file_path)
+            return self.cache[memory_file_path]
+
+        if memory_file_path not in self._loading:
+            task = asyncio.create_task(self._download_memories(api_key, dial_client, memory_file_path))
+            self._loading[memory_file_path] = task
+            task.add_done_callback(lambda _: self._loading.pop(memory_file_path, None))
+        return await asyncio.shield(self._loading[memory_file_path])
+
+    async def _download_memories(self, api_key: str, dial_client: AsyncDial, memory_file_path: str) -> MemoryCollection:
+        generation = self._generations.get(memory_file_path, 0)
+        try:
+            response, index_content = await asyncio.gather(
+                dial_client.files.download(memory_file_path),
+                self._download_index(dial_client, memory_file_path),
+            )
+            # Parsing, validation and index build are CPU-bound, keep them off the event loop
+            collection = await asyncio.to_thread(MemoryCollection.model_validate_json, response.get_content())
+            embeddings = await self._load_embeddings(dial_client, memory_file_path, collection)
+            persisted_index = await asyncio.to_thread(self._deserialize_index, index_content, collection)
+            await asyncio.to_thread(self._build_index, collection, embeddings, persisted_index)
+        except ResourceNotFoundError:
+            collection = MemoryCollection(memories=[], updated_at=datetime.now(UTC))
+
+        if generation != self._generations.get(memory_file_path, 0):
+            # Memories were deleted while downloading
+            collection = MemoryCollection(memories=[], updated_at=datetime.now(UTC))
+        collection._generation = self._generations.get(memory_file_path, 0)
+        self._put_to_cache(memory_file_path, collection)
+
+        if collection._embeddings_saved_rows < len(collection.memories):
+            # Embeddings were migrated from legacy file or re-encoded, persist them in background to never encode
+            # them again, first request doesn't wait for the upload
+            self._schedule_save(api_key, collection)
+
+        return collection
+
+    async def _load_embeddings(
+            self, dial_client: AsyncDial, memory_file_path: str, collection: MemoryCollection
+    ) -> np.ndarray | None:
+        """
+        Load embeddings of the collection from sidecar chunks (downloaded in parallel).
+        Falls back to inline embeddings of legacy files or, if sidecars are missing, written for another layout of
+        the memories (chunks start with `embeddings_id`) or have wrong number of rows, re-encodes the memories content.
+        """
+        n = len(collection.memories)
+        if not n:
+            return None
+
+        if all(memory.embedding_b64 for memory in collection.memories):
+            return decode_embeddings([memory.embedding_b64 for memory in collection.memories])
+
+        embeddings_id = collection.embeddings_id
+        try:
+            if not embeddings_id:
+                raise ValueError("memories file has no embeddings id")
+            responses = await asyncio.gather(*[
+                dial_client.files.download(self._get_embeddings_file_path(memory_file_path, chunk))
+                for chunk in range(math.ceil(n / self.EMBEDDINGS_CHUNK_SIZE))
+            ])
+            embeddings = await asyncio.to_thread(
+                self._deserialize_embeddings, [response.get_content() for response in responses], embeddings_id
+            )
+            if embeddings.shape[0] == n:
+                collection._embeddings_saved_rows = n
+                return embeddings.astype(np.float32)
+            print(f"Embeddings sidecar has {embeddings.shape[0]} rows for {n} memories, re-encoding")
+        except Exception as e:
+            print(f"Embeddings sidecar is not loaded, re-encoding memories: {e}")
+
+        return await self.embedder.embed_many([memory.data.content for memory in collection.memories])
+
+    @staticmethod
+    def _deserialize_embeddings(chunks: list[bytes], embeddings_id: str) -> np.ndarray:
+        prefix = embeddings_id.encode('ascii')
+        if any(chunk[:len(prefix)] != prefix for chunk in chunks):
+            # Chunk upload failed after memories file with new layout was uploaded
+            raise ValueError("embeddings chunk belongs to another layout of memories")
+        return np.vstack([np.load(io.BytesIO(chunk[len(prefix):])) for chunk in chunks])
+
+    async def _download_index(self, dial_client: AsyncDial, memory_file_path: str) -> bytes | None:
+        try:
+            response = await dial_client.files.download(self._get_index_file_path(memory_file_path))
+            return response.get_content()
+        except Exception:
+            return None
+
+    def _deserialize_index(self, content: bytes | None, collection: MemoryCollection) -> faiss.Index | None:
+        """
+        Restore persisted index if it belongs to the collection (sidecar starts with `faiss_index_id`) and
+        has no more rows than the collection, otherwise index will be rebuilt.
+        """
+        index_id = collection.faiss_index_id
+        if not content or not index_id or content[:len(index_id)] != index_id.encode('ascii'):
+            return None
+
+        try:
+            index = faiss.deserialize_index(np.frombuffer(content, dtype=np.uint8, offset=len(index_id)))
+        except Exception as e:
+            # Truncated upload or sidecar written by incompatible FAISS version, index is rebuilt from embeddings
+            print(f"Long-term memories index sidecar is not loaded, rebuilding index: {e}")
+            return None
+        if index.ntotal > len(collection.memories):
+            return None
+        if isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = self.HNSW_EF_SEARCH
+        return index
 
     async def _save_memories(self, api_key: str, memories: MemoryCollection):
-        """Save memories to DIAL bucket and update cache."""
-        #TODO:
-        # 1. Create AsyncDial client
-        # 2. Get memory file path
-        # 3. Update `updated_at` of memories (now)
-        # 4. Converts memories to json string (it's pydentic model and it have model dump json method for this). Don't
-        #    make any indentations because it will make file 'bigger'. Here is the point that we store all the memories
-        #    in one file and 'one memory' with its embeddings takes ~6-8Kb, we expect that there are won't be more that
-        #    1000 memories but anyway for 1000 memories it will be ~6-8Mb, so, we need to make at least these small
-        #    efforts to make it smaller 😉
-        # 5. Put to cache (kind reminder the key is memory file path)
-        raise NotImplementedError()
+        """
+        Save memories metadata, not yet persisted embedding chunks and rebuilt HNSW index to DIAL bucket and
+        update cache.
+
+        Uploaded content is a snapshot taken without awaiting, changes made while uploading (adds, deduplication)
+        go to the next save. Saves of the same user are serialized, so older snapshot never overwrites newer.
+        Collection loaded before memories were deleted is not saved.
+        """
+        dial_client = AsyncDial(base_url=self.endpoint, api_key=api_key)
+        memory_file_path = await self._get_memory_file_path(dial_client)
+
+        async with self._save_locks.setdefault(memory_file_path, asyncio.Lock()):
+            if self._is_deleted(memory_file_path, memories):
+                return
+
+            index_content = None
+            index = memories._faiss_index
+            # Flat index is rebuilt from embeddings with a single memcpy, only HNSW graph is worth persisting
+            if not memories._faiss_index_saved and isinstance(index, faiss.IndexHNSW):
+                memories.faiss_index_id = uuid.uuid4().hex
+                # Serialized on the event loop, adds must not modify the graph while it is written
+                index_content = memories.faiss_index_id.encode('ascii') + faiss.serialize_index(index).tobytes()
+
+            saved_rows = memories._embeddings_saved_rows
+            if saved_rows == 0:
+                # All chunks are rewritten, new id invalidates chunks of the previous layout left by a failed upload
+                memories.embeddings_id = uuid.uuid4().hex
+
+            memories.updated_at = datetime.now(UTC)
+            # Memories list and embeddings matrix are replaced on changes, never modified in place
+            snapshot = memories.model_copy(update={"memories": list(memories.memories)})
+            embeddings = memories._normalized
+            layout_version = memories._layout_version
+            rows = len(snapshot.memories)
+
+            json_content, embedding_chunks = await asyncio.gather(
+                asyncio.to_thread(self._serialize_memories, snapshot),
+                asyncio.to_thread(self._serialize_embeddings, embeddings, snapshot.embeddings_id, saved_rows, rows),
+            )
+            uploads = [
+                dial_client.files.upload(url=self._get_embeddings_file_path(memory_file_path, chunk), file=content)
+                for chunk, content in embedding_chunks.items()
+            ]
+            if index_content is not None:
+                uploads.append(
+                    dial_client.files.upload(url=self._get_index_file_path(memory_file_path), file=index_content)
+                )
+            await asyncio.gather(dial_client.files.upload(url=memory_file_path, file=json_content), *uploads)
+
+            # Failed upload leaves the flag unset, so the next save retries it
+            if index_content is not None and memories._faiss_index is index:
+                memories._faiss_index_saved = True
+
+            # Uploaded rows are stale if deduplication shifted them meanwhile, its save has to rewrite all chunks
+            if memories._layout_version == layout_version:
+                memories._embeddings_saved_rows = rows
+
+            # Deletion waits for this upload and removes the files, deleted collection must not get back to cache
+            if not self._is_deleted(memory_file_path, memories):
+                self._put_to_cache(memory_file_path, memories)
+
+    def _is_deleted(self, memory_file_path: str, collection: MemoryCollection) -> bool:
+        return collection._generation != self._generations.get(memory_file_path, 0)
+
+    def _schedule_save(self, api_key: str, collection: MemoryCollection) -> asyncio.Task:
+        """
+        Save collection after SAVE_DELAY_SECONDS, changes made until then are uploaded with the same save.
+        Returns the shared save task, callers that have to report persisted changes await it.
+        The collection is already updated in cache, so reads see the changes immediately.
+        """
+        collection_key = id(collection)
+        if (pending_save := self._pending_saves.get(collection_key)) is not None:
+            return pending_save
+
+        async def _delayed_save():
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.SAVE_DELAY_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            # Changes made while uploading schedule a new save
+            self._pending_saves.pop(collection_key, None)
+            await self._save_with_retries(api_key, collection)
+
+        pending_save = self._run_in_background(_delayed_save(), "save")
+        self._pending_saves[collection_key] = pending_save
+        return pending_save
+
+    async def _save_with_retries(self, api_key: str, collection: MemoryCollection):
+        """Save collection retrying transient failures, the last failure is raised."""
+        for attempt in range(1, self.SAVE_MAX_ATTEMPTS + 1):
+            try:
+                await self._save_memories(api_key, collection)
+                return
+            except Exception as e:
+                # Expired per-request key or rejected request won't succeed on retry
+                is_client_error = isinstance(e, DialException) and 400 <= e.status_code < 500
+                if is_client_error or attempt == self.SAVE_MAX_ATTEMPTS:
+                    raise
+                print(f"Long-term memories save failed (attempt {attempt}/{self.SAVE_MAX_ATTEMPTS}), retrying: {e}")
+                await asyncio.sleep(self.SAVE_RETRY_DELAY_SECONDS * attempt)
+
+    async def flush(self):
+        """Upload pending saves right away and wait for them and running deduplications, e.g. on shutdown."""
+        self._flush_requested.set()
+        await asyncio.gather(*self._pending_saves.values(), *self._deduplicating.values(), return_exceptions=True)
+
+    def _run_in_background(self, coroutine: Coroutine, name: str) -> asyncio.Task:
+        """Fire-and-forget task, referenced until done and logged on failure."""
+        def _on_done(done_task: asyncio.Task):
+            self._background_tasks.discard(done_task)
+            if not done_task.cancelled() and done_task.exception():
+                print(f"Long-term memories {name} failed: {done_task.exception()}")
+
+        task = asyncio.create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(_on_done)
+        return task
+
+    def _serialize_embeddings(
+            self, embeddings: np.ndarray | None, embeddings_id: str, saved_rows: int, rows: int
+    ) -> dict[int, bytes]:
+        """
+        Content of the embedding chunks that contain rows added since the last save: `embeddings_id` followed by
+        float16 `.npy` matrix.
+        """
+        chunks = {}
+        if embeddings is None:
+            return chunks
+
+        for chunk in range(saved_rows // self.EMBEDDINGS_CHUNK_SIZE, math.ceil(rows / self.EMBEDDINGS_CHUNK_SIZE)):
+            start = chunk * self.EMBEDDINGS_CHUNK_SIZE
+            end = min(start + self.EMBEDDINGS_CHUNK_SIZE, rows)
+            buffer = io.BytesIO(embeddings_id.encode('ascii'))
+            buffer.seek(0, io.SEEK_END)
+            np.save(buffer, embeddings[start:end].astype(np.float16))
+            chunks[chunk] = buffer.getvalue()
+        return chunks
+
+    def _put_to_cache(self, memory_file_path: str, collection: MemoryCollection):
+        """Put collection to cache evicting the least recently used one, bounds memory held by cached indexes."""
+        self.cache[memory_file_path] = collection
+        self.cache.move_to_end(memory_file_path)
+        while len(self.cache) > self.CACHE_MAX_SIZE:
+            self.cache.popitem(last=False)
+
+    @staticmethod
+    def _serialize_memories(memories: MemoryCollection) -> bytes:
+        """Compact (no indentation) JSON bytes of the collection, ready for upload."""
+        return orjson.dumps(memories.model_dump())
+
+    def _build_index(
+            self, collection: MemoryCollection, embeddings: np.ndarray | None, persisted_index: faiss.Index | None = None
+    ):
+        """
+        (Re)build cached normalized embeddings and FAISS index of the collection.
+        Persisted index is reused as is, only rows added after it was saved are added to it.
+        """
+        collection._normalized = None
+        collection._faiss_index = None
+        collection._faiss_index_saved = False
+        if embeddings is None or not len(embeddings):
+            return
+
+        # Re-normalize after float16 round trip (and for older files that stored non-normalized embeddings)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(embeddings)
+        if persisted_index is None:
+            self._append_to_index(collection, embeddings)
+            return
+
+        collection._normalized = embeddings
+        collection._faiss_index = persisted_index
+        collection._faiss_index_saved = True
+        if persisted_index.ntotal < len(embeddings):
+            persisted_index.add(embeddings[persisted_index.ntotal:])
+
+    def _create_index(self, dimension: int, size: int) -> faiss.Index:
+        """Cosine similarity (inner product over normalized vectors) index suitable for `size` vectors."""
+        if size < self.HNSW_THRESHOLD:
+            return faiss.IndexFlatIP(dimension)
+
+        index = faiss.IndexHNSWSQ(dimension, self.HNSW_QUANTIZER, self.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = self.HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = self.HNSW_EF_SEARCH
+        return index
+
+    def _needs_new_index(self, index: faiss.Index | None, size: int) -> bool:
+        """First build or collection has outgrown exact search."""
+        return index is None or (isinstance(index, faiss.IndexFlatIP) and size >= self.HNSW_THRESHOLD)
+
+    def _create_filled_index(self, normalized: np.ndarray) -> faiss.Index:
+        """New index over L2-normalized embeddings, takes seconds for thousands of rows when it is HNSW."""
+        size, dimension = normalized.shape
+        index = self._create_index(dimension, size)
+        if not index.is_trained:
+            # Scalar quantizer learns per-dimension value ranges
+            index.train(normalized)
+        index.add(normalized)
+        return index
+
+    @staticmethod
+    def _set_index(collection: MemoryCollection, normalized: np.ndarray, index: faiss.Index):
+        collection._normalized = normalized
+        collection._faiss_index = index
+        collection._faiss_index_saved = False
+        if not isinstance(index, faiss.IndexHNSW):
+            # Flat index is never persisted, previously saved HNSW sidecar must not be loaded for this collection
+            collection.faiss_index_id = None
+
+    def _append_to_index(self, collection: MemoryCollection, new_normalized: np.ndarray):
+        """Add L2-normalized embeddings to the cached FAISS index, rebuilding it only when needed."""
+        if collection._normalized is None:
+            normalized = new_normalized
+        else:
+            normalized = np.vstack([collection._normalized, new_normalized])
+
+        if self._needs_new_index(collection._faiss_index, len(normalized)):
+            self._set_index(collection, normalized, self._create_filled_index(normalized))
+        else:
+            collection._faiss_index.add(new_normalized)
+            collection._normalized = normalized
+
+    async def _remove_from_index(self, collection: MemoryCollection, keep: np.ndarray):
+        """Drop memories not marked in `keep` mask together with their rows of cached embeddings and FAISS index."""
+        normalized = collection._normalized[keep]
+        index = collection._faiss_index
+        if isinstance(index, faiss.IndexFlatIP):
+            # Flat index (below HNSW_THRESHOLD rows) compacts remaining vectors, positions stay aligned with memories
+            index.remove_ids(np.flatnonzero(~keep).astype(np.int64))
+        else:
+            # HNSW graph doesn't support removal, rebuild it from the cached embeddings off the event loop
+            index = await asyncio.to_thread(self._create_filled_index, normalized)
+
+        collection.memories = [memory for memory, is_kept in zip(collection.memories, keep) if is_kept]
+        self._set_index(collection, normalized, index)
 
     async def add_memory(self, api_key: str, content: str, importance: float, category: str, topics: list[str]) -> str:
         """Add a new memory to storage."""
-        #TODO:
-        # 1. Load memories
-        # 2. Make encodings for content with embedding model.
-        #    Hint: provide content as list, and after encoding get first result (encode wil return list) and convertit `tolist`
-        # 3. Create Memory
-        #    - for id use `int(datetime.now(UTC).timestamp())` it will provide time now as int, it will be super enough
-        #      to avoid collisions. Also, we won't use id but we added it because maybe in future you will make enhanced
-        #      version of long-term memory and after that it will be additional 'headache' to add such ids 😬
-        # 4. Add to memories created memory
-        # 5. Save memories (it is PUT request bzw, -> https://dialx.ai/dial_api#tag/Files/operation/uploadFile)
-        # 6. Return information that content has benn successfully stored
-        raise NotImplementedError()
-
-    async def search_memories(self, api_key: str, query: str, top_k: int = 5) -> list[MemoryData]:
-        """
-        Search memories using semantic similarity.
+        await self.add_memories_batch(
+            api_key=api_key,
+            memories=[NewMemory(content=content, importance=importance, category=category, topics=topics)],
+        )
+        return f"Memory successfully stored: {content}"
+
+    async def add_memories_batch(self, api_key: str, memories: list[NewMemory]) -> str:
+        """Add several memories with a single embedding batch and a single save."""
+        if not memories:
+            return "No memories to store."
+
+        collection = await self._load_memories(api_key)
+
+        embeddings = await self.embedder.embed_many([memory.content for memory in memories])
+
+        # Running deduplication searches the index in a worker thread, it must not be modified meanwhile
+        async with collection._index_lock:
+            rebuilt = None
+            if self._needs_new_index(collection._faiss_index, len(collection.memories) + len(memories)):
+                normalized = embeddings
+                if collection._normalized is not None:
+                    normalized = np.vstack([collection._normalized, embeddings])
+                # HNSW graph construction is CPU-heavy, keep it off the event loop.
+                # Concurrent searches use the old index and memories until both are replaced below
+                rebuilt = await asyncio.to_thread(self._create_filled_index, normalized)
+
+            # Nanosecond timestamp ids, kept increasing within the collection so bursty adds never collide
+            first_id = time.time_ns()
+            if collection.memories:
+                first_id = max(first_id, collection.memories[-1].data.id + 1)
+            for offset, memory in enumerate(memories):
+                collection.memories.append(
+                    Memory(
+                        data=MemoryData(id=first_id + offset, **memory.model_dump()),
+                    )
+                )
+            if rebuilt is None:
+                self._append_to_index(collection, embeddings)
+            else:
+                self._set_index(collection, normalized, rebuilt)
+
+        # Shielded: shared save of the parallel store calls must not be cancelled with one of them
+        await asyncio.shield(self._schedule_save(api_key, collection))
+
+        return f"{len(memories)} memories successfully stored."
+
+    async def search_memories(self, api_key: str, query: str, top_k: int = 3) -> list[MemoryData]:
+        """
+        Search memories using semantic similarity, candidates are reranked with cross-encoder.
 
         Returns:
             List of MemoryData objects (without embeddings)
         """
-        #TODO:
-        # 1. Load memories
-        # 2. If they are empty return empty array
-        # ---
-        # 3. Check if they needs_deduplication, if yes then deduplicate_and_save (need to implements both of these methods)
-        # 4. Make vector search (embeddings are part of memory)😈
-        # 5. Return `top_k` MemoryData based on vector search
-        raise NotImplementedError()
+        collection = await self._load_memories(api_key)
+        if not collection.memories:
+            return []
+
+        if self._needs_deduplication(collection):
+            self._schedule_deduplication(api_key, collection)
+
+        query_embedding = (await self.embedder.embed(query))[None, :]
+
+        k = min(top_k * self.RERANK_CANDIDATES_FACTOR, len(collection.memories))
+        _, indices = collection._faiss_index.search(query_embedding, k)
+        positions = indices[0][indices[0] != -1]
+        candidates = [collection.memories[idx].data for idx in positions]
+        if len(candidates) <= 1:
+            return candidates
+
+        scores = await self.reranker_batcher.submit_many([(query, candidate.content) for candidate in candidates])
+        # Top-k by score in NumPy, Python only touches the returned candidates
+        order = np.argsort(-np.asarray(scores, dtype=np.float32), kind="stable")[:top_k]
+
+        return [candidates[i] for i in order]
 
     def _needs_deduplication(self, collection: MemoryCollection) -> bool:
         """Check if deduplication is needed (>24 hours since last deduplication)."""
-        #TODO:
-        # The criteria for deduplication (collection length > 10 and >24 hours since last deduplication) or
-        # (collection length > 10 last deduplication is None)
-        raise NotImplementedError()
+        if len(collection.memories) <= 10:
+            return False
+        if collection.last_deduplicated_at is None:
+            return True
+        return datetime.now(UTC) - collection.last_deduplicated_at > timedelta(hours=self.DEDUP_INTERVAL_HOURS)
+
+    def _schedule_deduplication(self, api_key: str, collection: MemoryCollection):
+        """
+        Run deduplication as fire-and-forget task so search doesn't wait for it (it works with current memories).
+        Only one deduplication per collection can be in flight.
+        """
+        collection_key = id(collection)
+        if collection_key in self._deduplicating:
+            return
+
+        task = self._run_in_background(self._deduplicate_and_save(api_key, collection), "deduplication")
+        self._deduplicating[collection_key] = task
+        task.add_done_callback(lambda _: self._deduplicating.pop(collection_key, None))
 
     async def _deduplicate_and_save(self, api_key: str, collection: MemoryCollection) -> MemoryCollection:
         """
-        Deduplicate memories synchronously and save the result.
+        Deduplicate memories in place and save the result.
+        Batch search and HNSW rebuild run in worker threads, adds to the collection wait for them.
         Returns the updated collection.
         """
-        #TODO:
-        # 1. Make fast deduplication (need to implement)
-        # 2. Update last_deduplicated_at as now
-        # 3. Save deduplicated memories
-        # 4. Return deduplicated collection
-        raise NotImplementedError()
+        async with collection._index_lock:
+            keep = await asyncio.to_thread(
+                self._deduplicate_fast, collection.memories, collection._faiss_index, collection._normalized
+            )
+            if not keep.all():
+                await self._remove_from_index(collection, keep)
+                # Rows are shifted, all embedding chunks have to be rewritten
+                collection._layout_version += 1
+                collection._embeddings_saved_rows = 0
+            collection.last_deduplicated_at = datetime.now(UTC)
 
-    def _deduplicate_fast(self, memories: list[Memory]) -> list[Memory]:
+        await self._save_with_retries(api_key, collection)
+
+        return collection
+
+    def _deduplicate_fast(self, memories: list[Memory], index: faiss.Index, embeddings: np.ndarray) -> np.ndarray:
         """
         Fast deduplication using FAISS batch search with cosine similarity.
 
@@ -133,25 +624,69 @@ class LongTermMemoryStore:
         - Find k nearest neighbors for each memory using cosine similarity
         - Mark duplicates based on similarity threshold (cosine similarity > 0.75)
         - Keep memory with higher importance
+
+        `index` and `embeddings` are the cached search state of the collection, so nothing is re-encoded or rebuilt.
+        Returns boolean mask of memories to keep.
         """
-        #TODO:
-        # This is the hard part 🔥🔥🔥
-        # You need to deduplicate memories, duplicates are the memories that have 75% similarity.
-        # Among duplicates remember about `importance`, most important have more priorities to survive
-        # It must be fast, it is possible to do for O(n log n), probably you can find faster way (share with community if do 😉)
-        # Return deduplicated memories
-        raise NotImplementedError()
+        n = len(memories)
+        if n < 2:
+            return np.ones(n, dtype=bool)
+
+        k = min(self.DEDUP_NEIGHBORS, n)
+        similarities, indices = index.search(embeddings, k)
+
+        # Each (memory, neighbor) pair above threshold removes its less important side, ties keep the older memory
+        rows = np.arange(n)[:, None]
+        is_duplicate = (indices != -1) & (indices != rows) & (similarities > self.DEDUP_SIMILARITY_THRESHOLD)
+        neighbors = np.where(indices == -1, rows, indices)
+
+        importance = np.array([memory.data.importance for memory in memories], dtype=np.float32)
+        self_importance = importance[:, None]
+        neighbor_importance = importance[neighbors]
+        keep_self = (self_importance > neighbor_importance) | (
+                (self_importance == neighbor_importance) & (rows < neighbors)
+        )
+
+        to_remove = np.where(keep_self, neighbors, rows)[is_duplicate]
+        keep = np.ones(n, dtype=bool)
+        keep[to_remove] = False
+
+        return keep
 
     async def delete_all_memories(self, api_key: str, ) -> str:
         """
         Delete all memories for the user.
 
-        Removes the memory file from DIAL bucket and clears the cache
-        for the current conversation.
+        Removes the memory file with its sidecars from DIAL bucket and clears the cache. Pending saves of the user
+        are skipped and running ones are awaited, so deleted memories are never uploaded back.
         """
-        #TODO:
-        # 1. Create AsyncDial client
-        # 2. Get memory file path
-        # 3. Delete file
-        # 4. Return info about successful memory deletion
-        raise NotImplementedError()
+        dial_client = AsyncDial(base_url=self.endpoint, api_key=api_key)
+        memory_file_path = await self._get_memory_file_path(dial_client)
+
+        self._generations[memory_file_path] = self._generations.get(memory_file_path, 0) + 1
+        collection = self.cache.pop(memory_file_path, None)
+        # Pending saves are not cancelled (store calls await them), they see the new generation and upload nothing
+        if collection is not None:
+            if deduplication := self._deduplicating.get(id(collection)):
+                # Its save is skipped, wait so it doesn't modify the collection after deletion is reported
+                await asyncio.wait([deduplication])
+
+        # Running upload finishes before files are deleted
+        async with self._save_locks.setdefault(memory_file_path, asyncio.Lock()):
+            # Memory file doesn't exist yet if the first save hasn't been uploaded
+            for file_path in (memory_file_path, self._get_index_file_path(memory_file_path)):
+                try:
+                    await dial_client.files.delete(file_path)
+                except ResourceNotFoundError:
+                    pass
+
+            # Chunks are contiguous from 0, stale ones may be left after deduplication shrank the collection
+            chunk = 0
+            while True:
+                try:
+                    await dial_client.files.delete(self._get_embeddings_file_path(memory_file_path, chunk))
+                except ResourceNotFoundError:
+                    break
+                chunk += 1
+
+        return "All long-term memories have been successfully deleted."
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Callable, Generic, Sequence, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collects items submitted concurrently (e.g. requests of different users in the same moment) for
+    `max_wait_seconds` and processes them with a single `process_batch` call, so the fixed cost of a model forward
+    pass is paid once per batch. `process_batch` runs in a worker thread and doesn't block the event loop.
+    """
+
+    def __init__(self, process_batch: Callable[[list[T]], Sequence[R]], max_wait_seconds: float = 0.005):
+        self.process_batch = process_batch
+        self.max_wait_seconds = max_wait_seconds
+        self._queue: asyncio.Queue[tuple[T, asyncio.Future]] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+
+    async def submit_many(self, items: list[T]) -> list[R]:
+        """Results of the items, result i belongs to items[i]."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item in items:
+            future = loop.create_future()
+            self._queue.put_nowait((item, future))
+            futures.append(future)
+
+        return list(await asyncio.gather(*futures))
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.max_wait_seconds)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                results = await asyncio.to_thread(self.process_batch, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
@@ -10,3 +10,4 @@ class ToolCallParams:
     choice: Choice
     api_key: str
     conversation_id: str
+    messages_count: int = 0
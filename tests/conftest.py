@@ -0,0 +1,106 @@
+import hashlib
+from pathlib import PurePosixPath
+
+import numpy as np
+import pytest
+from aidial_client import ResourceNotFoundError
+
+from task.tools.memory import memory_store as memory_store_module
+from task.tools.memory.memory_store import LongTermMemoryStore
+
+EMBEDDING_DIMENSION = 384
+
+
+class FakeEmbeddingModel:
+    """
+    Deterministic stand-in for SentenceTransformer and CrossEncoder.
+    Texts with the same part before `#` get near-duplicate embeddings ("A cat" and "A cat#copy").
+    """
+
+    def encode(self, texts: list[str], normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        embeddings = np.stack([self._embed(text) for text in texts])
+        if normalize_embeddings:
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings
+
+    def predict(self, pairs: list[tuple[str, str]], **kwargs) -> np.ndarray:
+        return np.array([len(set(query.split()) & set(content.split())) for query, content in pairs], dtype=np.float32)
+
+    @staticmethod
+    def _embed(text: str) -> np.ndarray:
+        base, _, variant = text.partition('#')
+        seed = int(hashlib.md5(base.encode()).hexdigest()[:8], 16)
+        embedding = np.random.default_rng(seed).standard_normal(EMBEDDING_DIMENSION).astype(np.float32)
+        if variant:
+            embedding += 0.1 * np.random.default_rng(seed + 1).standard_normal(EMBEDDING_DIMENSION).astype(np.float32)
+        return embedding
+
+
+class _FakeResponse:
+
+    def __init__(self, content: bytes):
+        self._content = content
+
+    def get_content(self) -> bytes:
+        return self._content
+
+
+class FakeFiles:
+
+    def __init__(self, storage: dict[str, bytes], failing_uploads: set[str]):
+        self._storage = storage
+        self._failing_uploads = failing_uploads
+
+    async def download(self, url: str, **kwargs) -> _FakeResponse:
+        if url not in self._storage:
+            raise ResourceNotFoundError(url)
+        return _FakeResponse(self._storage[url])
+
+    async def upload(self, url: str, file: bytes, **kwargs):
+        if any(url.endswith(suffix) for suffix in self._failing_uploads):
+            raise RuntimeError(f"Upload of {url} failed")
+        self._storage[url] = file
+
+    async def delete(self, url: str, **kwargs):
+        if url not in self._storage:
+            raise ResourceNotFoundError(url)
+        del self._storage[url]
+
+
+class FakeDialStorage:
+    """In-memory DIAL bucket shared by all `AsyncDial` clients, uploads of files ending with `failing_uploads` fail."""
+
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+        self.failing_uploads: set[str] = set()
+
+    def client(self, base_url: str = None, api_key: str = None):
+        dial_client = type("FakeAsyncDial", (), {})()
+        dial_client.files = FakeFiles(self.files, self.failing_uploads)
+
+        async def my_appdata_home() -> PurePosixPath:
+            return PurePosixPath(f"bucket-{api_key}/appdata/general-purpose-agent")
+
+        dial_client.my_appdata_home = my_appdata_home
+        return dial_client
+
+
+@pytest.fixture
+def dial_storage(monkeypatch) -> FakeDialStorage:
+    storage = FakeDialStorage()
+    monkeypatch.setattr(memory_store_module, "AsyncDial", storage.client)
+    monkeypatch.setattr(memory_store_module, "CrossEncoder", lambda *args, **kwargs: FakeEmbeddingModel())
+    monkeypatch.setattr(LongTermMemoryStore, "_create_embedding_model", staticmethod(FakeEmbeddingModel))
+    return storage
+
+
+@pytest.fixture
+def create_store(dial_storage):
+    """Factory of stores sharing the fake DIAL bucket, new store acts as restarted application (cold cache)."""
+    def _create() -> LongTermMemoryStore:
+        store = LongTermMemoryStore(endpoint="http://localhost:8080")
+        store.SAVE_DELAY_SECONDS = 0.0
+        store.SAVE_RETRY_DELAY_SECONDS = 0.0
+        return store
+
+    return _create
@@ -0,0 +1,15 @@
+from task.tools.memory.memory_search_tool import SearchMemoryTool
+
+
+def test_required_parameters_are_declared():
+    parameters = SearchMemoryTool(memory_store=None).parameters
+
+    assert parameters["required"] == ["query"]
+    for name in parameters["required"]:
+        assert name in parameters["properties"]
+
+
+def test_extra_parameters_are_not_allowed():
+    parameters = SearchMemoryTool(memory_store=None).parameters
+
+    assert parameters["additionalProperties"] is False
@@ -0,0 +1,96 @@
+import asyncio
+
+import faiss
+import numpy as np
+import pytest
+
+from task.tools.memory._models import Memory, MemoryData, NewMemory
+from tests.conftest import FakeEmbeddingModel
+
+API_KEY = "test-key"
+
+
+def _embed(texts: list[str]) -> np.ndarray:
+    return FakeEmbeddingModel().encode(texts, normalize_embeddings=True)
+
+
+def _count_encodes(store) -> list[int]:
+    calls = []
+    encode = store.model.encode
+
+    def _counting_encode(texts, **kwargs):
+        calls.append(len(texts))
+        return encode(texts, **kwargs)
+
+    store.model.encode = _counting_encode
+    return calls
+
+
+def test_deduplicate_fast_keeps_more_important_memory(create_store):
+    store = create_store()
+    contents = ["User lives in Paris", "User lives in Paris#copy", "User likes cats", "User likes cats#copy"]
+    importances = [0.3, 0.9, 0.5, 0.5]
+    memories = [
+        Memory(data=MemoryData(id=i, content=content, importance=importance))
+        for i, (content, importance) in enumerate(zip(contents, importances))
+    ]
+    embeddings = _embed(contents)
+    index = faiss.IndexFlatIP(embeddings.shape[1])
+    index.add(embeddings)
+
+    keep = store._deduplicate_fast(memories, index, embeddings)
+
+    # Less important duplicate is removed, equal importance keeps the older memory
+    assert keep.tolist() == [False, True, True, False]
+
+
+def test_saved_memories_are_loaded_without_re_encoding(create_store, dial_storage):
+    contents = ["User lives in Paris", "User likes cats", "User works as a teacher"]
+
+    async def _run():
+        await create_store().add_memories_batch(API_KEY, [NewMemory(content=content) for content in contents])
+
+        restarted_store = create_store()
+        encodes = _count_encodes(restarted_store)
+        collection = await restarted_store._load_memories(API_KEY)
+
+        assert [memory.data.content for memory in collection.memories] == contents
+        assert encodes == []
+        np.testing.assert_allclose(collection._normalized, _embed(contents), atol=1e-3)
+
+    asyncio.run(_run())
+
+
+def test_failed_chunk_upload_after_deduplication_is_recovered(create_store, dial_storage):
+    contents = ["User lives in Paris", "User likes cats", "User works as a teacher", "User likes cats#copy"]
+
+    async def _run():
+        store = create_store()
+        await store.add_memories_batch(API_KEY, [NewMemory(content=content) for content in contents])
+        collection = await store._load_memories(API_KEY)
+
+        # Memories file with deduplicated rows is uploaded, but embeddings chunk of the old layout stays
+        dial_storage.failing_uploads.add("embeddings_0.npy")
+        with pytest.raises(RuntimeError):
+            await store._deduplicate_and_save(API_KEY, collection)
+        dial_storage.failing_uploads.clear()
+
+        restarted_store = create_store()
+        encodes = _count_encodes(restarted_store)
+        collection = await restarted_store._load_memories(API_KEY)
+        loaded_contents = [memory.data.content for memory in collection.memories]
+
+        assert loaded_contents == contents[:3]
+        assert encodes == [3]
+        np.testing.assert_allclose(collection._normalized, _embed(loaded_contents), atol=1e-5)
+
+        # Re-encoded embeddings are persisted, next start loads them
+        await restarted_store.flush()
+        next_store = create_store()
+        encodes = _count_encodes(next_store)
+        collection = await next_store._load_memories(API_KEY)
+
+        assert encodes == []
+        np.testing.assert_allclose(collection._normalized, _embed(loaded_contents), atol=1e-3)
+
+    asyncio.run(_run())